@@ -20,39 +20,126 @@ from langchain_core.messages import BaseMessage, ToolMessage, SystemMessage
 from langchain_core.tools import tool
 from langchain_core.language_models import BaseChatModel
 from langgraph.types import Command
-import inspect
-import json
+from langgraph.config import get_stream_writer
+from pydantic import BaseModel
+import asyncio
+import functools
+import orjson
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
 
 # Global registry for dynamic mold state fields
 _MOLD_STATE_REGISTRY = {}
 
-# Global debug flag for controlling prints
-_DEBUG_MODE = False
+# Cache of dynamically built MoldState classes, keyed by the mold name/type pairs
+# so repeated agent constructions skip the TypedDict metaclass work entirely
+_MOLD_STATE_CACHE = {}
+
+# Cache of bind_tools results so agents sharing the same model and toolset
+# pay the tool-schema generation cost only once; size-capped so it doesn't
+# pin models and bound wrappers for the process lifetime
+_BOUND_TOOLS_CACHE = {}
+_BOUND_TOOLS_CACHE_MAX_SIZE = 128
+
+# Shared no-op node result - never mutated, only handed to the reducer
+_EMPTY_RESULT = {"messages": []}
+
+# Debug logging: _log is swapped between print and a no-op so hot paths pay
+# no global-flag branch when debug is off
+def _noop_log(*args, **kwargs):
+    pass
+
+_log = _noop_log
+
+def _set_debug(debug: bool):
+    """Swap the module-level logger between print and a no-op"""
+    global _log
+    _log = print if debug else _noop_log
 
 def mold(func):
     """Revolutionary mold decorator with auto-registration for dynamic MoldState"""
     # Extract field name from function name
     field_name = func.__name__.replace('_mold', '')
 
-    # Get function signature to extract data type
-    sig = inspect.signature(func)
-    params = list(sig.parameters.values())
-
-    # Find the data parameter (skip tool_call_id)
-    data_param = None
-    for param in params:
-        if param.name != 'tool_call_id':
-            data_param = param
-            break
+    # Find the data parameter directly (skip tool_call_id) - much cheaper
+    # than building a full inspect.signature at import time
+    data_name, data_type = next(
+        ((name, ann) for name, ann in func.__annotations__.items()
+         if name not in ('tool_call_id', 'return')),
+        (None, None),
+    )
 
-    if data_param and data_param.annotation != inspect.Parameter.empty:
+    if data_type is not None:
         # Auto-register state field for dynamic MoldState
-        _MOLD_STATE_REGISTRY[field_name] = data_param.annotation
-        if _DEBUG_MODE:
-            print(f"Mold '{field_name}' auto-registered with type: {data_param.annotation}")
+        _MOLD_STATE_REGISTRY[field_name] = data_type
+        _log(f"Mold '{field_name}' auto-registered with type: {data_type}")
+
+    mold_args_schema = None
+    if (
+        msgspec is not None
+        and isinstance(data_type, type)
+        and issubclass(data_type, msgspec.Struct)
+    ):
+        # Opt-in fast path: molds typed with a msgspec.Struct get msgspec's
+        # convert/encode instead of Pydantic for high-volume structuring
+        inner_func = func
+
+        @functools.wraps(inner_func)
+        def func(*args, **kwargs):
+            data = kwargs.get(data_name)
+            if isinstance(data, dict):
+                try:
+                    kwargs[data_name] = msgspec.convert(data, data_type)
+                except msgspec.ValidationError as e:
+                    # Bad LLM args become a tool-error message the model
+                    # can correct, not a crash in the molds node
+                    return f"Error: invalid arguments for '{data_name}': {e}"
+            result = inner_func(*args, **kwargs)
+            if isinstance(result, msgspec.Struct):
+                return msgspec.json.encode(result).decode()
+            return result
+
+        # @tool can't build a Pydantic args_schema around a Struct
+        # annotation - expose the data parameter as a plain dict so the raw
+        # args reach the wrapper and msgspec.convert actually runs (wraps
+        # copies the inner annotations dict, so replace it, don't mutate),
+        # and hand @tool the Struct's real JSON schema so the LLM still
+        # sees field names, types and required keys
+        func.__annotations__ = {**inner_func.__annotations__, data_name: dict}
+        struct_schema = msgspec.json.schema(data_type)
+        defs = struct_schema.pop("$defs", None)
+        mold_args_schema = {
+            "title": inner_func.__name__,
+            "description": inner_func.__doc__ or "Structure data into JSON format",
+            "type": "object",
+            "properties": {data_name: struct_schema},
+            "required": [data_name],
+        }
+        if defs is not None:
+            # Hoist nested definitions so the Struct schema's $refs resolve
+            # from the document root
+            mold_args_schema["$defs"] = defs
+    else:
+        # Serialize Pydantic results here, before langchain-core wraps them
+        # in a ToolMessage - otherwise the content is the model's str()
+        # repr, not JSON, and no downstream code can fix it up
+        inner_func = func
+
+        @functools.wraps(inner_func)
+        def func(*args, **kwargs):
+            result = inner_func(*args, **kwargs)
+            if isinstance(result, BaseModel):
+                return result.model_dump_json()
+            return result
 
     # Apply @tool decorator first
-    decorated_tool = tool(func)
+    if mold_args_schema is not None:
+        decorated_tool = tool(func, args_schema=mold_args_schema)
+    else:
+        decorated_tool = tool(func)
 
     # Override name to add _mold suffix automatically
     original_name = func.__name__
@@ -70,6 +157,14 @@ def mold(func):
 
 def create_dynamic_mold_state(molds):
     """Create MoldState dynamically based on registered molds"""
+    # Reuse a previously built state class when the same molds/types come back
+    cache_key = tuple(sorted(
+        (mold_func.name, id(_MOLD_STATE_REGISTRY.get(mold_func.name.replace('_mold', ''))))
+        for mold_func in molds
+    ))
+    if cache_key in _MOLD_STATE_CACHE:
+        return _MOLD_STATE_CACHE[cache_key]
+
     # Base fields that every MoldState needs
     base_fields = {
         'messages': Annotated[list[BaseMessage], add_messages]
@@ -83,105 +178,207 @@ def create_dynamic_mold_state(molds):
         if field_name in _MOLD_STATE_REGISTRY:
             field_type = _MOLD_STATE_REGISTRY[field_name]
             base_fields[field_name] = Optional[field_type]
-            if _DEBUG_MODE:
-                print(f"Added dynamic field '{field_name}': {field_type}")
+            _log(f"Added dynamic field '{field_name}': {field_type}")
 
     # Create TypedDict dynamically
     DynamicMoldState = TypedDict('DynamicMoldState', base_fields)
+    _MOLD_STATE_CACHE[cache_key] = DynamicMoldState
     return DynamicMoldState
     
 class BasicToolNode:
     """A node that runs the tools requested in the last AIMessage"""
-    
+
+    __slots__ = ("tools_by_name",)
+
     def __init__(self, tools: list) -> None:
         self.tools_by_name = {tool.name: tool for tool in tools}
 
-    def __call__(self, inputs: dict):
+    async def __call__(self, inputs: dict):
         if messages := inputs.get("messages", []):
             message = messages[-1]
         else:
             raise ValueError("No message found in input")
-        outputs = []
-        for tool_call in message.tool_calls:
-            tool_result = self.tools_by_name[tool_call["name"]].invoke(
+
+        # Zero-allocation fast path when there's nothing to run
+        tool_calls = message.tool_calls
+        if not tool_calls:
+            return _EMPTY_RESULT
+
+        # Run independent tool calls concurrently and process each result the
+        # moment its tool finishes, instead of waiting on the whole batch
+        async def run_one(tool_call):
+            tool_result = await self.tools_by_name[tool_call["name"]].ainvoke(
                 tool_call["args"]
             )
-            outputs.append(
-                ToolMessage(
-                    content=json.dumps(tool_result),
-                    name=tool_call["name"],
-                    tool_call_id=tool_call["id"],
-                )
+            return tool_call, tool_result
+
+        # Surface finished results on the custom stream right away so
+        # consumers don't have to wait for the slowest call in the batch
+        writer = get_stream_writer()
+
+        outputs = []
+        for future in asyncio.as_completed([run_one(tc) for tc in tool_calls]):
+            tool_call, tool_result = await future
+            # Skip the JSON round-trip when the tool already returned text
+            if isinstance(tool_result, str):
+                content = tool_result
+            elif isinstance(tool_result, bytes):
+                content = tool_result.decode()
+            else:
+                content = orjson.dumps(tool_result, default=str).decode()
+            tool_message = ToolMessage(
+                content=content,
+                name=tool_call["name"],
+                tool_call_id=tool_call["id"],
             )
+            writer({"tool_result": tool_message})
+            outputs.append(tool_message)
         return {"messages": outputs}
 
 class BasicMoldNode:
     """A node that executes mold tool calls"""
 
+    __slots__ = ("mold_tools_by_name", "_result_cache")
+
+    # Bound on the per-node result cache for repeated identical mold calls
+    _CACHE_MAX_SIZE = 256
+
     def __init__(self, mold_tools: list) -> None:
         self.mold_tools_by_name = {tool.name: tool for tool in mold_tools}
+        self._result_cache = {}
+
+    async def _invoke_cached(self, tool_call):
+        """Invoke a mold, reusing cached results for repeated identical args"""
+        cache_key = (
+            tool_call["name"],
+            orjson.dumps(tool_call["args"], option=orjson.OPT_SORT_KEYS, default=str),
+        )
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            # Cached ToolMessages answer the call that produced them - rebind
+            # the payload to this call's id (and drop the message id so the
+            # copy isn't deduplicated against the original)
+            if isinstance(cached, ToolMessage):
+                return cached.model_copy(
+                    update={"tool_call_id": tool_call["id"], "id": None}
+                )
+            return cached
+
+        tool_result = await self.mold_tools_by_name[tool_call["name"]].ainvoke(tool_call)
 
-    def __call__(self, inputs: dict):
+        # Command results carry state updates tied to this specific call -
+        # never reuse those; plain results are safe to cache
+        if not isinstance(tool_result, Command):
+            if len(self._result_cache) >= self._CACHE_MAX_SIZE:
+                self._result_cache.pop(next(iter(self._result_cache)))
+            self._result_cache[cache_key] = tool_result
+        return tool_result
+
+    async def __call__(self, inputs: dict):
         message = inputs["messages"][-1]
+
+        # Zero-allocation fast path when there's nothing to run; membership
+        # in the prebuilt name map is O(1) vs an endswith suffix compare
+        mold_calls = [
+            tool_call for tool_call in message.tool_calls
+            if tool_call["name"] in self.mold_tools_by_name
+        ]
+        if not mold_calls:
+            return _EMPTY_RESULT
+
         outputs = []
         state_updates = {}
-
-        for tool_call in message.tool_calls:
-            if tool_call["name"].endswith("_mold"):
-                tool_result = self.mold_tools_by_name[tool_call["name"]].invoke(tool_call)
-
-                # Handle Command return type
-                if isinstance(tool_result, Command):
-                    # Extract messages from Command
-                    if "messages" in tool_result.update:
-                        outputs.extend(tool_result.update["messages"])
-                    # Extract state updates
-                    for key, value in tool_result.update.items():
-                        if key != "messages":
-                            state_updates[key] = value
-                else:
-                    # Handle string return type (for non-Command molds)
-                    outputs.append(
-                        ToolMessage(
-                            content=tool_result,
-                            name=tool_call["name"],
-                            tool_call_id=tool_call["id"],
-                        )
-                    )
+        mold_results = await asyncio.gather(
+            *(self._invoke_cached(tool_call) for tool_call in mold_calls)
+        )
+
+        for tool_call, tool_result in zip(mold_calls, mold_results):
+            # Handle Command return type
+            if isinstance(tool_result, Command):
+                # Extract messages from Command
+                if "messages" in tool_result.update:
+                    outputs.extend(tool_result.update["messages"])
+                # Extract state updates
+                for key, value in tool_result.update.items():
+                    if key != "messages":
+                        state_updates[key] = value
+            else:
+                # Invoking a tool with the full ToolCall dict already yields
+                # a ready ToolMessage whose content the mold decorator has
+                # serialized to JSON - append it as-is, don't re-wrap it
+                outputs.append(tool_result)
+
+        # Pre-deduplicate by message id so the add_messages reducer doesn't
+        # re-hash duplicates carried in by concurrent Command updates
+        seen_ids = set()
+        outputs = [
+            msg for msg in outputs
+            if (msg_id := getattr(msg, "id", None)) is None
+            or not (msg_id in seen_ids or seen_ids.add(msg_id))
+        ]
 
         result = {"messages": outputs}
         result.update(state_updates)
         return result
 
-def smart_route(state):
-    """Route to Tools/Molds/END"""
-    ai_message = state["messages"][-1]
+def create_smart_route(mold_names: frozenset):
+    """Create a router to Tools/Molds/END for a known set of mold names"""
 
-    if hasattr(ai_message, "tool_calls") and len(ai_message.tool_calls) > 0:
-        # Check if any tool call is a mold (has _mold suffix from decorator)
-        for tool_call in ai_message.tool_calls:
-            if tool_call["name"].endswith("_mold"):
-                return "molds"
-        return "tools"
+    def smart_route(state):
+        """Route to Tools/Molds/END"""
+        ai_message = state["messages"][-1]
 
-    return END
+        tool_calls = getattr(ai_message, "tool_calls", None)
+        if not tool_calls:
+            return END
+
+        # O(1) membership check against the known mold names - also avoids
+        # false positives from regular tools that happen to end in _mold
+        return "molds" if any(tc["name"] in mold_names for tc in tool_calls) else "tools"
+
+    return smart_route
+
+def _route_tools_only(state):
+    """Route to Tools/END for agents with no molds registered"""
+    return "tools" if getattr(state["messages"][-1], "tool_calls", None) else END
+
+def _route_molds_only(state):
+    """Route to Molds/END for agents with no plain tools registered"""
+    return "molds" if getattr(state["messages"][-1], "tool_calls", None) else END
 
 def create_chatbot_node(model: Union[str, BaseChatModel], tools: list = None, molds: list = None, prompt: str = ""):
     """Create a configurable chatbot node"""
+    # Bind tools once per agent - bind_tools re-generates every tool's JSON
+    # schema, so doing it per turn would repeat O(#tools) work on every call.
+    # The bound wrapper is shared across agents with the same model/toolset.
+    all_tools = (tools or []) + (molds or [])
+    if all_tools:
+        cache_key = (id(model), tuple(t.name for t in all_tools))
+        llm_with_tools = _BOUND_TOOLS_CACHE.get(cache_key)
+        if llm_with_tools is None:
+            if len(_BOUND_TOOLS_CACHE) >= _BOUND_TOOLS_CACHE_MAX_SIZE:
+                _BOUND_TOOLS_CACHE.pop(next(iter(_BOUND_TOOLS_CACHE)))
+            llm_with_tools = _BOUND_TOOLS_CACHE[cache_key] = model.bind_tools(all_tools)
+    else:
+        # Providers reject an empty tools array - the chatbot-only graph
+        # shape just uses the bare model
+        llm_with_tools = model
+
+    # Build the system message once instead of per turn
+    system_message = SystemMessage(content=prompt) if prompt else None
 
     async def chatbot(state) -> Dict[str, Any]:
         """🚀 Revolutionary MOLD Agent chatbot node with dynamic state compatibility"""
-        # Use the model directly - same as create_react_agent pattern
-        llm_model = model
-
-        # Combine all tools (molds are already tools with @mold decorator)
-        all_tools = tools + molds
-        llm_with_tools = llm_model.bind_tools(all_tools)
-
-        # Add system prompt if provided
+        # Prepend the system prompt unless the state already leads with one;
+        # checking index 0 is O(1), with the exact-class test first to skip
+        # the MRO walk isinstance does (subclasses still match the fallback)
         messages = state["messages"]
-        if prompt and not any(isinstance(msg, SystemMessage) for msg in messages):
-            messages = [SystemMessage(content=prompt)] + messages
+        if system_message is not None and (
+            not messages
+            or (type(messages[0]) is not SystemMessage
+                and not isinstance(messages[0], SystemMessage))
+        ):
+            messages = [system_message] + messages
 
         response = await llm_with_tools.ainvoke(messages)
 
@@ -198,37 +395,52 @@ def create_mold_agent(
 ) -> StateGraph:
     """🚀 Revolutionary MOLD Agent (Modular Output Learning Design) - The Future of create_react_agent"""
 
-    # Set global debug mode
-    global _DEBUG_MODE
-    _DEBUG_MODE = debug
+    # Set debug logging (print vs no-op)
+    _set_debug(debug)
 
     # 🚀 Create dynamic state based on molds - REVOLUTIONARY!
     DynamicMoldState = create_dynamic_mold_state(molds or [])
-    if _DEBUG_MODE:
-        print(f"🚀 Created dynamic MoldState with fields: {list(DynamicMoldState.__annotations__.keys())}")
-
-    # Create nodes
-    chatbot_node = create_chatbot_node(model, tools, molds, prompt)
-    tool_node = BasicToolNode(tools)
-    mold_node = BasicMoldNode(molds)
+    _log(f"🚀 Created dynamic MoldState with fields: {list(DynamicMoldState.__annotations__.keys())}")
 
     # Build the MOLD Agent graph with dynamic state
     graph_builder = StateGraph(DynamicMoldState)
+    graph_builder.add_node("chatbot", create_chatbot_node(model, tools, molds, prompt))
 
-    # Add nodes
-    graph_builder.add_node("chatbot", chatbot_node)
-    graph_builder.add_node("tools", tool_node)
-    graph_builder.add_node("molds", mold_node)
+    # Specialize the graph shape: only wire the nodes and routing branches
+    # that can actually be reached with this agent's tools/molds
+    has_tools = bool(tools)
+    has_molds = bool(molds)
+    if has_tools:
+        graph_builder.add_node("tools", BasicToolNode(tools))
+    if has_molds:
+        graph_builder.add_node("molds", BasicMoldNode(molds))
 
     # Add edges
     graph_builder.add_edge(START, "chatbot")
-    graph_builder.add_conditional_edges(
-        "chatbot",
-        smart_route,
-        {"tools": "tools", "molds": "molds", END: END},
-    )
-    graph_builder.add_edge("tools", "chatbot")
-    graph_builder.add_edge("molds", "chatbot")
+
+    if has_tools and has_molds:
+        # Known mold names for O(1) routing checks
+        mold_names = frozenset(m.name for m in molds)
+        graph_builder.add_conditional_edges(
+            "chatbot",
+            create_smart_route(mold_names),
+            {"tools": "tools", "molds": "molds", END: END},
+        )
+    elif has_tools:
+        graph_builder.add_conditional_edges(
+            "chatbot", _route_tools_only, {"tools": "tools", END: END},
+        )
+    elif has_molds:
+        graph_builder.add_conditional_edges(
+            "chatbot", _route_molds_only, {"molds": "molds", END: END},
+        )
+    else:
+        graph_builder.add_edge("chatbot", END)
+
+    if has_tools:
+        graph_builder.add_edge("tools", "chatbot")
+    if has_molds:
+        graph_builder.add_edge("molds", "chatbot")
 
     return graph_builder.compile()
 